@@ -1,85 +1,71 @@
 import argparse, re
-from enum import Enum
 from io import TextIOWrapper
-from typing import DefaultDict, Tuple
+from typing import Dict, List, Optional, Tuple
 from math import inf
 
+# Regular expressions for finding coordinates in file lines, 
+# with and without optional tool definition (e.g. T01)
+_COORD_TOOL_RE = re.compile(r"X(-?[0-9]+\.[0-9]{3})Y(-?[0-9]+\.[0-9]{3})(T[0-9]{2,})?")
+_COORD_RE = re.compile(r"X(-?[0-9]+\.[0-9]{3})Y(-?[0-9]+\.[0-9]{3})")
 
-def get_formatted_coords(x: float, y: float) -> str:
-    """Creates formatted coordinates."""
+# Template of formatted coordinates, e.g. X93.350Y116.850
+_COORDS_FORMAT = "X{:.3f}Y{:.3f}"
 
-    x_str = "{:.3f}".format(x)
-    y_str = "{:.3f}".format(y)
-    
-    return f"X{x_str}Y{y_str}"
+# Size of file buffers, large CNC programs are read and written in 1 MiB chunks
+_BUFFER_SIZE = 1 << 20
+
+
+def get_tool_number(tool_def: str) -> int:
+    """Gets number of the tool from tool definition (e.g. 1 from T01)."""
 
+    return int(tool_def[1:])
 
-def write_sorted_blocks(blocks: DefaultDict, out: TextIOWrapper) -> None:
-    """Writes blocks of code into output file in ascending order.
+
+def write_sorted_blocks(blocks: Dict[str, Tuple[List[float], List[float]]], 
+                        out: TextIOWrapper) -> None:
+    """Writes blocks of code into output file in ascending order 
+       of tool numbers.
     
     Keyword arguments:
-    blocks -- dictionary which stores set of 
-              tool definitions and corresponding coordinates.
+    blocks -- dictionary which stores set of tool definitions and 
+              corresponding X and Y coordinates as two parallel lists.
     out    -- output file where modified contents of 
               original file will be written
     """
 
-    for tool_def in sorted(blocks.keys()):
-        include_definition = True
-
-        for x, y in blocks[tool_def]:
-            out_line = get_formatted_coords(x, y)
+    # tools are ordered by their numbers, so T100 comes after T99
+    for tool_def in sorted(blocks.keys(), key=get_tool_number):
+        xs, ys = blocks[tool_def]
+        # whole columns are formatted by a single template mapped over them
+        out_lines = list(map(_COORDS_FORMAT.format, xs, ys))
 
-            if include_definition:
-                out_line += tool_def
-                include_definition = False
-                                                                
-            out.write(out_line + '\n')
+        # tool definition is included only in the first line of the block
+        out_lines[0] += tool_def
 
-def get_coords(match: re.Match[str]) -> Tuple[float, float]:
-    """Gets coordinates from string matched by regex pattern 
-       as a pair of floats.
-    
-       Keyword arguments:
-       match -- matched substring of the original line
-    """
+        # whole block is written at once, trailing newline separately 
+        # so the joined block is not copied by concatenation
+        out.write('\n'.join(out_lines))
+        out.write('\n')
 
-    x_coord = float(match.group(1))
-    y_coord = float(match.group(2))
 
-    return x_coord, y_coord
+def print_min_max(xs: List[float], ys: List[float]) -> None:
+    """Prints minimum and maximum values for X and Y 
+       in format xmin/xmax/ymin/ymax.
 
-def parse_line(match: re.Match[str], blocks: DefaultDict, 
-               out: TextIOWrapper, tool_def: str) -> str:
-    """Extracts XY coordinates and tool definition, if present. Modifies Y coordinate
-       if X > 50 and stores data in the dictionary if tool definition is set.
-       Returns new tool definition.
-       
        Keyword arguments:
-       match    -- matched substring of the original line.
-       blocks   -- dictionary which stores a set of coordinates associated with tool definition.
-       tool_def -- string representing tool definition. Indicates which block is being processed.
-        """
-
-    if match.group(3) is not None:
-        # set tool_def if it is present in the current line
-        tool_def = match.group(3)
-
-    x_coord, y_coord = get_coords(match)
-
-    if x_coord > 50:
-        y_coord += 10
+       xs   -- X values from code blocks
+       ys   -- Y values from code blocks
+    """
 
-    if tool_def:    
-        blocks[tool_def].append((x_coord, y_coord))
-    else:  
-        # tool definition not set means CNC code blocks are not being processed. 
-        out.write(get_formatted_coords(x_coord, y_coord) + '\n')
+    # whole columns are reduced at once by built-in min/max
+    min_x, max_x = min(xs, default=inf), max(xs, default=-inf)
+    min_y, max_y = min(ys, default=inf), max(ys, default=-inf)
 
-    return tool_def
+    print(f"{min_x:.3f}/{max_x:.3f}/{min_y:.3f}/{max_y:.3f}")
 
 
-def fun1(path: str) -> None:
+def fun1(path: str, 
+         extremas_coords: Optional[Tuple[List[float], List[float]]] = None) -> None:
     """Parses input CNC program file. 
 
        Sorts blocks of CNC code according to tool definition in ascending order. 
@@ -88,84 +74,72 @@ def fun1(path: str) -> None:
        Creates a new file cnc.txt in directory where script was executed.
        
     Keyword arguments:
-    path -- path to the input CNC program file. 
+    path            -- path to the input CNC program file. 
+    extremas_coords -- optional pair of lists where original X and Y values 
+                       of the first code blocks are collected, as fun2 reads them.
     """
 
-    # Regular expression for finding coordinates in file lines
-    pattern = "X(-*[0-9]+\.[0-9]{3})Y(-*[0-9]+\.[0-9]{3})(T[0-9]{2,})?"
-    blocks = DefaultDict(list)
+    blocks = {}
     tool_definition = None
+    # bound appends of the block being processed, rebound on tool definition change
+    append_x = append_y = None
+    # lines outside of code blocks, written at once when code blocks end
+    out_lines = []
+    # bound appends collecting coordinates for extremas, unset after first code blocks
+    collect_x = collect_y = None
+
+    if extremas_coords is not None:
+        collect_x, collect_y = extremas_coords[0].append, extremas_coords[1].append
     
     try:
-        with open(path, 'r', encoding="utf-8") as infile, open("cnc.txt", 'w', encoding="utf-8") as outfile:
-            lines = infile.readlines()
-
-            for line in lines:
-                match = re.search(pattern, line)
+        with open(path, 'r', encoding="utf-8", buffering=_BUFFER_SIZE) as infile, \
+             open("cnc.txt", 'w', encoding="utf-8", buffering=_BUFFER_SIZE) as outfile:
+            # lines are streamed from the file instead of being read into a list at once
+            for line in infile:
+                match = _COORD_TOOL_RE.search(line)
 
                 if match:
+                    x_str, y_str, line_tool_def = match.groups()
+                    x_coord, y_coord = float(x_str), float(y_str)
+
+                    if x_coord > 50:
+                        y_coord += 10
+
                     # tool_definition gets updated if line contains tool definition (e.g. T01)
-                    tool_definition = parse_line(match, blocks, outfile, tool_definition)
+                    if line_tool_def is not None:
+                        tool_definition = line_tool_def
+                        xs, ys = blocks.setdefault(tool_definition, ([], []))
+                        append_x, append_y = xs.append, ys.append
+
+                    if tool_definition:
+                        append_x(x_coord)
+                        append_y(y_coord)
+
+                        if collect_x:
+                            # extremas are searched among unmodified coordinates
+                            collect_x(x_coord)
+                            collect_y(float(y_str))
+                    else:
+                        # tool definition not set means CNC code blocks are not being processed. 
+                        out_lines.append(f"X{x_coord:.3f}Y{y_coord:.3f}\n")
 
                 # no match and tool definition set indicates end of CNC code blocks
                 elif tool_definition:
+                    outfile.writelines(out_lines)
+                    out_lines.clear()
                     write_sorted_blocks(blocks, outfile)
-                    outfile.write(line)
+                    out_lines.append(line)
                     tool_definition = None
+                    collect_x = collect_y = None
                 else:
-                    outfile.write(line)
+                    out_lines.append(line)
+
+            outfile.writelines(out_lines)
                     
     except OSError:
         print("Cannot open/read file", path)
 
 
-# Helping class for better readability.
-class Extreme(Enum):
-    min_x = 1
-    max_x = 2
-    min_y = 3
-    max_y = 4
-
-
-def update_min_max(xy: Tuple[float, float], ex: dict[float]) -> None:
-    """Checks if x and y values are not new minimum or maximum values.
-       If so, extremas are updated.
-    
-       Keyword arguments:
-       xy   -- X and Y value to be checked
-       ex   -- dictionary with minimum and maximum values for X and Y
-    """
-
-    x, y = xy[0], xy[1]
-    
-    if x < ex[Extreme.min_x]:
-        ex[Extreme.min_x] = x
-
-    if x > ex[Extreme.max_x]:
-        ex[Extreme.max_x] = x
-
-    if y < ex[Extreme.min_y]:
-        ex[Extreme.min_y] = y
-
-    if y > ex[Extreme.max_y]:
-        ex[Extreme.max_y] = y
-
-
-def print_min_max(ex: dict[float]) -> None:
-    """Prints minimum and maximum values for X and Y.
-       
-       ex -- minimum and maximum values 
-            stored in order xmin/xmax/ymin/ymax
-    """
-
-    extremas = []
-
-    for value in ex.values():
-        extremas.append("{:.3f}".format(value))
-
-    print('/'.join(extremas))
-
-
 def fun2(path: str) -> None:
     """Finds and prints minimum and maximum values for 
        X and Y from CNC program code blocks.
@@ -174,35 +148,53 @@ def fun2(path: str) -> None:
        path -- path to the input CNC program file
     """
 
-    extremas = { Extreme.min_x : inf, Extreme.max_x : -inf, 
-                 Extreme.min_y : inf, Extreme.max_y : -inf  }
-    pattern = "X(-*[0-9]+\.[0-9]{3})Y(-*[0-9]+\.[0-9]{3})(T[0-9]{2,})?"
-    in_block = False
+    xs, ys = [], []
 
     try:
-        with open(path, 'r', encoding="utf-8") as infile:
-            lines = infile.readlines()
+        with open(path, 'r', encoding="utf-8", buffering=_BUFFER_SIZE) as infile:
+            # lines are streamed, so reading stops as soon as code blocks end
+            for line in infile:
+                # lines without any X cannot contain coordinates
+                if 'X' not in line:
+                    continue
+
+                match = _COORD_TOOL_RE.search(line)
+
+                # Code blocks are reached on the first tool definition
+                if match and match.group(3) is not None:
+                    xs.append(float(match.group(1)))
+                    ys.append(float(match.group(2)))
+                    break
+
+            # Rest of the code blocks is read from the same position, 
+            # tool definitions no longer need to be searched for
+            for line in infile:
+                match = _COORD_RE.search(line)
 
-            for line in lines:
-                match = re.search(pattern, line)
-                
-                if match:
-                    # Check if code blocks were reached
-                    if not in_block:
-                        in_block = match.group(3) is not None
-
-                    # Search for min/max values inside code blocks
-                    if in_block:
-                        xy_coords = get_coords(match)
-                        update_min_max(xy_coords, extremas)
-                
                 # Reaching the end of code blocks
-                elif in_block:
+                if not match:
                     break
+
+                x_str, y_str = match.groups()
+                xs.append(float(x_str))
+                ys.append(float(y_str))
     except OSError:
         print("Cannot open/read file")
 
-    print_min_max(extremas)
+    print_min_max(xs, ys)
+
+
+def run_both(path: str) -> None:
+    """Performs both fun1 and fun2 in a single pass over 
+       the input CNC program file.
+
+       Keyword arguments:
+       path -- path to the input CNC program file
+    """
+
+    xs, ys = [], []
+    fun1(path, (xs, ys))
+    print_min_max(xs, ys)
 
 
 parser = argparse.ArgumentParser()
@@ -210,7 +202,12 @@ parser.add_argument("-fun1", action="store")
 parser.add_argument("-fun2", action="store")
 args = parser.parse_args()
 
-if args.fun1:
-    fun1(args.fun1)
-elif args.fun2:
-    fun2(args.fun2)
+if args.fun1 and args.fun1 == args.fun2:
+    # same file for both is read only once
+    run_both(args.fun1)
+else:
+    if args.fun1:
+        fun1(args.fun1)
+
+    if args.fun2:
+        fun2(args.fun2)